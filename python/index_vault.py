@@ -9,28 +9,58 @@ Supports PDF text extraction and image OCR when dependencies are available.
 import sys
 import json
 import logging
+import multiprocessing
 import time
 import os
+import queue
 import re
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Deque, Dict, List, Any, Iterable, Iterator, Optional, Set, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
 
-try:
-    import chromadb
-    from chromadb.config import Settings
-    from chromadb.api import ClientAPI
-except ImportError:
-    print(json.dumps({
-        "type": "error",
-        "message": "chromadb not installed. Run: pip install chromadb>=1.0.0"
-    }), file=sys.stderr)
-    sys.exit(1)
+# Spawned extraction workers re-import this script as __mp_main__. They only parse
+# PDFs and images, so they skip the slow chromadb import
+if __name__ != '__mp_main__':
+    try:
+        import chromadb
+        from chromadb.config import Settings
+        from chromadb.api import ClientAPI
+    except ImportError:
+        print(json.dumps({
+            "type": "error",
+            "message": "chromadb not installed. Run: pip install chromadb>=1.0.0"
+        }), file=sys.stderr)
+        sys.exit(1)
 
 # Optional dependencies with graceful degradation
+ORJSON_AVAILABLE = False
+PYMUPDF_AVAILABLE = False
 PYPDF2_AVAILABLE = False
 PILLOW_AVAILABLE = False
 PYTESSERACT_AVAILABLE = False
+TESSEROCR_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    pass
+
+try:
+    # PyMuPDF >= 1.24.3 prints a deprecation notice on stdout when imported as fitz
+    import pymupdf as fitz
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    try:
+        import fitz  # Older PyMuPDF releases
+        PYMUPDF_AVAILABLE = True
+    except ImportError:
+        pass
 
 try:
     import PyPDF2
@@ -50,9 +80,63 @@ try:
 except ImportError:
     pass
 
+try:
+    from tesserocr import PyTessBaseAPI, PSM
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    pass
 
-@dataclass
+# Actions are parsed with orjson when available; it is several times faster than json
+json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+# Writes are sent to Chroma in batches to amortize the per-request round-trip
+UPSERT_BATCH_SIZE = 100
+UPSERT_BATCH_MAX_BYTES = 5 * 1024 * 1024  # 5MB payload budget per request
+DELETE_BATCH_SIZE = 100
+# Upsert batches in flight at once, so request latency overlaps with preparing the next batch
+UPSERT_CONCURRENCY = 4
+
+# PDF parsing and OCR are CPU-bound, so they run in worker processes
+EXTRACTION_WORKERS = os.cpu_count() or 1
+
+# Metadata value types Chroma accepts as-is; JSON input only produces these exact types
+PRIMITIVE_METADATA_TYPES = frozenset((str, int, float, bool))
+
+# Per-document progress is throttled to at most one line per interval, or per
+# 1/200th of the actions (one batch while the total is still unknown)
+PROGRESS_INTERVAL = 0.25  # seconds
+PROGRESS_STEPS = 200
+
+# PDFs up to this size are read in one call and parsed from memory; larger ones are
+# opened by path so MuPDF only reads the parts it needs
+PDF_STREAM_MAX_BYTES = 256 * 1024
+
+# Images are downscaled so their longest side is at most this many pixels before OCR;
+# Tesseract's runtime grows with pixel count and larger images add little accuracy
+OCR_MAX_DIMENSION = 2500
+
+# File extensions (without the dot) that are sent through OCR
+IMAGE_EXTENSIONS = frozenset(('png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff', 'tif', 'webp'))
+
+# Content placeholders and the messages that replace them when extraction is unavailable
+PLACEHOLDER_REPLACEMENTS = {
+    '[PDF_CONTENT_PLACEHOLDER]': '[PDF content extraction not configured]',
+    '[IMAGE_OCR_PLACEHOLDER]': '[Image OCR not configured]'
+}
+PLACEHOLDER_PATTERN = re.compile(r'\[(?:PDF_CONTENT|IMAGE_OCR)_PLACEHOLDER\]')
+
+# Stub notes up to this length share cached placeholder replacements
+PLACEHOLDER_CACHE_MAX_CHARS = 1024
+
+# Marks the end of stdin on the action queue; a `null` input line parses to None
+_EOF = object()
+
+
+# Explicit __slots__ rather than dataclass(slots=True), which needs Python 3.10+
+@dataclass(frozen=True)
 class ChromaConfig:
+    __slots__ = ('host', 'port', 'ssl', 'token_header', 'token', 'tenant', 'database', 'collection')
+
     host: str
     port: int
     ssl: bool
@@ -63,13 +147,49 @@ class ChromaConfig:
     collection: str
 
 
+@dataclass
+class PreparedDocument:
+    id: str
+    text: str
+    metadata: Dict[str, Any]
+    size: int  # UTF-8 byte length of text
+
+
 class ChromaIndexer:
     def __init__(self, config: ChromaConfig):
         self.config = config
         self.client: Optional[ClientAPI] = None
         self.collection = None
+        # Bound collection write methods, resolved once per connection
+        self._upsert = None
+        self._delete = None
         self.processed = 0
         self.vault_root = ""  # Will be set from config
+
+        # Pending writes, flushed to Chroma in batches
+        self.pending_ids: List[str] = []
+        self.pending_documents: List[str] = []
+        self.pending_metadatas: List[Dict[str, Any]] = []
+        self.pending_bytes = 0
+        self.pending_deletes: List[str] = []
+
+        # Upsert batches being sent on writer threads with their IDs, oldest first
+        self.upsert_executor: Optional[ThreadPoolExecutor] = None
+        self.inflight_upserts: Deque[Tuple[Future, List[str]]] = deque()
+        self.inflight_upsert_ids: Set[str] = set()
+
+        # tesserocr API handle, created on first OCR use and reused
+        self._tess_api = None
+
+        # Worker processes for PDF extraction / OCR, started on first use
+        self.extraction_executor: Optional[ProcessPoolExecutor] = None
+
+        # Stdin reader state; total_actions stays None until stdin is exhausted
+        self.total_actions: Optional[int] = None
+        self.invalid_actions = 0
+        
+        # Progress JSON goes to the binary stdout buffer, flushed at meaningful points
+        self._out = sys.stdout.buffer
         
         # Setup logging to stderr so it doesn't interfere with JSON output
         logging.basicConfig(
@@ -78,32 +198,37 @@ class ChromaIndexer:
             stream=sys.stderr
         )
         self.logger = logging.getLogger(__name__)
-        
-        # Log availability of optional features
-        self.log_feature_availability()
 
     def log_feature_availability(self) -> None:
         """Log which optional features are available."""
         features = []
-        if PYPDF2_AVAILABLE:
-            features.append("PDF text extraction")
-        if PILLOW_AVAILABLE and PYTESSERACT_AVAILABLE:
-            features.append("Image OCR")
+        if PYMUPDF_AVAILABLE:
+            features.append("PDF text extraction (PyMuPDF)")
+        elif PYPDF2_AVAILABLE:
+            features.append("PDF text extraction (PyPDF2)")
+        if PILLOW_AVAILABLE and TESSEROCR_AVAILABLE:
+            features.append("Image OCR (tesserocr)")
+        elif PILLOW_AVAILABLE and PYTESSERACT_AVAILABLE:
+            features.append("Image OCR (pytesseract)")
         
         if features:
             self.logger.info(f"Optional features available: {', '.join(features)}")
         else:
             self.logger.info("No optional content extraction features available")
             
-        if not PYPDF2_AVAILABLE:
-            self.logger.debug("PDF extraction unavailable - install PyPDF2: pip install PyPDF2")
-        if not PILLOW_AVAILABLE or not PYTESSERACT_AVAILABLE:
+        if not PYMUPDF_AVAILABLE and not PYPDF2_AVAILABLE:
+            self.logger.debug("PDF extraction unavailable - install PyMuPDF: pip install PyMuPDF")
+        elif not PYMUPDF_AVAILABLE:
+            self.logger.debug("Using slower PyPDF2 for PDF extraction - install PyMuPDF: pip install PyMuPDF")
+        if not PILLOW_AVAILABLE or not (TESSEROCR_AVAILABLE or PYTESSERACT_AVAILABLE):
             missing = []
             if not PILLOW_AVAILABLE:
                 missing.append("Pillow")
-            if not PYTESSERACT_AVAILABLE:
+            if not (TESSEROCR_AVAILABLE or PYTESSERACT_AVAILABLE):
                 missing.append("pytesseract")
             self.logger.debug(f"Image OCR unavailable - install: pip install {' '.join(missing)}")
+        elif not TESSEROCR_AVAILABLE:
+            self.logger.debug("Using pytesseract subprocess OCR - install tesserocr for faster in-process OCR")
 
     def connect(self) -> bool:
         """Establish connection to Chroma Cloud."""
@@ -139,10 +264,12 @@ class ChromaIndexer:
 
             # Set tenant and database if supported
             try:
-                if hasattr(self.client, 'set_tenant'):
-                    self.client.set_tenant(self.config.tenant)
-                if hasattr(self.client, 'set_database'):
-                    self.client.set_database(self.config.database)
+                set_tenant = getattr(self.client, 'set_tenant', None)
+                if set_tenant:
+                    set_tenant(self.config.tenant)
+                set_database = getattr(self.client, 'set_database', None)
+                if set_database:
+                    set_database(self.config.database)
             except Exception as e:
                 self.logger.warning(f"Could not set tenant/database: {e}")
 
@@ -158,91 +285,245 @@ class ChromaIndexer:
                     self.logger.error(f"Failed to create collection: {e}")
                     return False
 
+            self._upsert = self.collection.upsert
+            self._delete = self.collection.delete
             return True
 
         except Exception as e:
             self.logger.error(f"Connection failed: {e}")
             return False
 
-    def process_action(self, action: Dict[str, Any]) -> bool:
-        """Process a single delta action."""
+    def queue_action(self, action: Dict[str, Any], processed_text: Optional[str] = None) -> Tuple[int, int]:
+        """Queue a single delta action for batched writing.
+
+        If processed_text is given, it is used instead of running content
+        extraction again. Returns (succeeded, failed) counts for the actions
+        resolved by this call, including any batch that was flushed as a
+        result of queueing.
+        """
+        succeeded = 0
+        failed = 0
         try:
             action_type = action.get('action')
             doc_id = action.get('id')
 
             if not doc_id:
                 self.logger.error("Action missing document ID")
-                return False
+                return 0, 1
 
             if action_type == 'upsert':
-                return self.upsert_document(action)
+                # Keep deletes and upserts in their original order
+                if self.pending_deletes:
+                    succeeded, failed = self.flush_deletes()
+
+                documents = self.prepare_upsert(action, processed_text)
+                # A document still being written by an earlier batch must land
+                # before this version of it, so wait for that batch first
+                if self.inflight_upsert_ids and any(document.id in self.inflight_upsert_ids for document in documents):
+                    flushed_ok, flushed_failed = self.wait_for_upserts(documents)
+                    succeeded += flushed_ok
+                    failed += flushed_failed
+
+                if len(documents) > 1:
+                    # Oversize documents upload their chunks as a batch of their own
+                    if self.upsert_document_chunked(doc_id, documents):
+                        succeeded += 1
+                    else:
+                        failed += 1
+                else:
+                    self.queue_upsert(documents[0])
+                    if (len(self.pending_ids) >= UPSERT_BATCH_SIZE or
+                            self.pending_bytes >= UPSERT_BATCH_MAX_BYTES):
+                        flushed_ok, flushed_failed = self.flush_upserts()
+                        succeeded += flushed_ok
+                        failed += flushed_failed
             elif action_type == 'delete':
-                return self.delete_document(doc_id)
+                if self.pending_ids or self.inflight_upserts:
+                    succeeded, failed = self.flush_upserts()
+                    flushed_ok, flushed_failed = self.wait_for_upserts()
+                    succeeded += flushed_ok
+                    failed += flushed_failed
+
+                self.pending_deletes.append(doc_id)
+                if len(self.pending_deletes) >= DELETE_BATCH_SIZE:
+                    flushed_ok, flushed_failed = self.flush_deletes()
+                    succeeded += flushed_ok
+                    failed += flushed_failed
             else:
                 self.logger.error(f"Unknown action type: {action_type}")
-                return False
+                failed += 1
 
         except Exception as e:
-            self.logger.error(f"Failed to process action: {e}")
-            return False
+            self.logger.error(f"Failed to process action {action.get('id')}: {e}")
+            failed += 1
 
-    def upsert_document(self, action: Dict[str, Any]) -> bool:
-        """Upsert a document into the collection."""
-        try:
-            doc_id = action['id']
-            text = action.get('text', '')
-            metadata = action.get('metadata', {})
-            file_path = metadata.get('path', '')
-            
-            # Process content based on metadata flags and file type
-            processed_text = self.process_content(text, metadata, file_path)
-            
-            # Check if content exceeds size limits and chunk if needed
-            if len(processed_text.encode('utf-8')) > 16000:  # 16KB limit with some buffer
-                return self.upsert_document_chunked(doc_id, processed_text, metadata)
-            
-            # Check if ID exceeds size limit and truncate if needed
-            if len(doc_id.encode('utf-8')) > 120:  # 128 byte limit with buffer
-                original_id = doc_id
-                doc_id = self.truncate_document_id(doc_id)
-                self.logger.warning(f"Truncated document ID from {len(original_id)} to {len(doc_id)} characters: {original_id} -> {doc_id}")
+        return succeeded, failed
+
+    def prepare_upsert(self, action: Dict[str, Any], processed_text: Optional[str] = None) -> List[PreparedDocument]:
+        """Expand an upsert action into one or more prepared documents."""
+        doc_id = action['id']
+        metadata = action.get('metadata', {})
+        
+        # Process content based on metadata flags and file type
+        if processed_text is None:
+            processed_text = self.process_content(action.get('text', ''), metadata, metadata.get('path', ''))
+        
+        # Check if content exceeds size limits and chunk if needed
+        text_bytes = processed_text.encode('utf-8')
+        if len(text_bytes) > 16000:  # 16KB limit with some buffer
+            return self.chunk_document(doc_id, processed_text, text_bytes, metadata)
+        
+        # Check if ID exceeds size limit and truncate if needed
+        if len(doc_id.encode('utf-8')) > 120:  # 128 byte limit with buffer
+            original_id = doc_id
+            doc_id = self.truncate_document_id(doc_id)
+            self.logger.warning(f"Truncated document ID from {len(original_id)} to {len(doc_id)} characters: {original_id} -> {doc_id}")
+        
+        # Ensure metadata is JSON-serializable
+        return [PreparedDocument(doc_id, processed_text, self.clean_metadata(metadata), len(text_bytes))]
+
+    def queue_upsert(self, document: PreparedDocument) -> None:
+        """Add a prepared document to the pending upsert batch."""
+        self.pending_ids.append(document.id)
+        self.pending_documents.append(document.text)
+        self.pending_metadatas.append(document.metadata)
+        self.pending_bytes += document.size
+
+    def flush_upserts(self) -> Tuple[int, int]:
+        """Send all pending documents as one upsert batch on a writer thread.
+
+        At most UPSERT_CONCURRENCY batches are in flight; this waits for the
+        oldest when the limit is reached. Returns (succeeded, failed) for the
+        batches that finished, not for the one just sent.
+        """
+        ids = self.pending_ids
+        documents = self.pending_documents
+        metadatas = self.pending_metadatas
+        self.pending_ids = []
+        self.pending_documents = []
+        self.pending_metadatas = []
+        self.pending_bytes = 0
+
+        succeeded = 0
+        failed = 0
+        if ids:
+            if self.upsert_executor is None:
+                self.upsert_executor = ThreadPoolExecutor(max_workers=UPSERT_CONCURRENCY)
             
-            # Ensure metadata is JSON-serializable
-            clean_metadata = self.clean_metadata(metadata)
+            while len(self.inflight_upserts) >= UPSERT_CONCURRENCY:
+                batch_ok, batch_failed = self.collect_oldest_upsert()
+                succeeded += batch_ok
+                failed += batch_failed
             
-            self.collection.upsert(
-                ids=[doc_id],
-                documents=[processed_text],
-                metadatas=[clean_metadata]
+            self.inflight_upserts.append(
+                (self.upsert_executor.submit(self.upsert_batch, ids, documents, metadatas), ids)
             )
-            
-            self.logger.debug(f"Upserted document: {doc_id}")
-            return True
-            
+            self.inflight_upsert_ids.update(ids)
+
+        # Collect any batches that already finished, in order
+        while self.inflight_upserts and self.inflight_upserts[0][0].done():
+            batch_ok, batch_failed = self.collect_oldest_upsert()
+            succeeded += batch_ok
+            failed += batch_failed
+        
+        return succeeded, failed
+
+    def collect_oldest_upsert(self) -> Tuple[int, int]:
+        """Wait for the oldest in-flight upsert batch. Returns its (succeeded, failed)."""
+        future, ids = self.inflight_upserts.popleft()
+        self.inflight_upsert_ids.difference_update(ids)
+        return future.result()
+
+    def wait_for_upserts(self, documents: Optional[List[PreparedDocument]] = None) -> Tuple[int, int]:
+        """Wait for in-flight upsert batches. Returns (succeeded, failed).
+
+        If documents are given, only waits until none of their IDs is in
+        flight; otherwise waits for every batch.
+        """
+        succeeded = 0
+        failed = 0
+        while self.inflight_upserts:
+            if documents is not None and not any(document.id in self.inflight_upsert_ids for document in documents):
+                break
+            batch_ok, batch_failed = self.collect_oldest_upsert()
+            succeeded += batch_ok
+            failed += batch_failed
+        return succeeded, failed
+
+    def upsert_batch(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Upsert prepared documents in a single request.
+
+        Falls back to per-document upserts if the batch is rejected, so one bad
+        document does not fail the whole batch. Returns (succeeded, failed).
+        """
+        try:
+            self._upsert(ids=ids, documents=documents, metadatas=metadatas)
+            self.logger.debug(f"Upserted batch of {len(ids)} documents")
+            return len(ids), 0
         except Exception as e:
-            error_msg = str(e)
-            # Check if this is a quota error (not a hard failure)
-            if "Quota exceeded" in error_msg:
-                self.logger.warning(f"Quota exceeded for document {action.get('id')}: {e}")
-                return True  # Treat quota errors as warnings, not failures
-            else:
-                self.logger.error(f"Failed to upsert document {action.get('id')}: {e}")
-                return False
+            self.logger.warning(f"Batch upsert of {len(ids)} documents failed, retrying individually: {e}")
+
+        succeeded = 0
+        for doc_id, text, metadata in zip(ids, documents, metadatas):
+            if self.upsert_single_document(doc_id, text, metadata):
+                succeeded += 1
+        return succeeded, len(ids) - succeeded
+
+    def flush_deletes(self) -> Tuple[int, int]:
+        """Delete all pending document IDs in a single request.
+
+        Falls back to per-document deletes if the batch is rejected.
+        Returns (succeeded, failed).
+        """
+        ids = self.pending_deletes
+        self.pending_deletes = []
+
+        if not ids:
+            return 0, 0
+
+        try:
+            self._delete(ids=ids)
+            self.logger.debug(f"Deleted batch of {len(ids)} documents")
+            return len(ids), 0
+        except Exception as e:
+            self.logger.warning(f"Batch delete of {len(ids)} documents failed, retrying individually: {e}")
+
+        succeeded = sum(1 for doc_id in ids if self.delete_document(doc_id))
+        return succeeded, len(ids) - succeeded
+
+    def flush_pending(self) -> Tuple[int, int]:
+        """Flush all pending upserts and deletes and wait for them. Returns (succeeded, failed)."""
+        upserted, upsert_failed = self.flush_upserts()
+        waited, wait_failed = self.wait_for_upserts()
+        deleted, delete_failed = self.flush_deletes()
+        return upserted + waited + deleted, upsert_failed + wait_failed + delete_failed
+
+    def flush_after_error(self) -> None:
+        """Write out documents queued before a run failed and report them as processed."""
+        if self._upsert is None:
+            return
+
+        try:
+            succeeded, _ = self.flush_pending()
+        except Exception as e:
+            self.logger.error(f"Failed to write queued documents: {e}")
+            return
+
+        if succeeded:
+            self.processed += succeeded
+            self.output_progress(
+                f"Processed {self.processed} documents before stopping",
+                self.processed,
+                self.total_actions
+            )
 
     def delete_document(self, doc_id: str) -> bool:
-        """Delete a document from the collection."""
+        """Delete a document from the collection.
+
+        Chroma ignores IDs that don't exist, so there is no existence check first.
+        """
         try:
-            # Check if document exists first
-            try:
-                result = self.collection.get(ids=[doc_id])
-                if not result['ids']:
-                    self.logger.warning(f"Document {doc_id} not found for deletion")
-                    return True  # Not an error if it doesn't exist
-            except Exception:
-                # If get fails, try delete anyway
-                pass
-            
-            self.collection.delete(ids=[doc_id])
+            self._delete(ids=[doc_id])
             self.logger.debug(f"Deleted document: {doc_id}")
             return True
             
@@ -251,100 +532,112 @@ class ChromaIndexer:
             return False
 
     def clean_metadata(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
-        """Clean metadata to ensure it's JSON-serializable and Chroma-compatible."""
-        clean = {}
-        for key, value in metadata.items():
-            if isinstance(value, (str, int, float, bool)):
-                clean[key] = value
-            elif value is None:
-                continue  # Skip None values
-            else:
-                # Convert complex types to strings
-                clean[key] = str(value)
-        return clean
+        """Clean metadata to ensure it's JSON-serializable and Chroma-compatible.
+
+        None values are dropped and complex types are converted to strings.
+        """
+        return {
+            key: value if type(value) in PRIMITIVE_METADATA_TYPES else str(value)
+            for key, value in metadata.items()
+            if value is not None
+        }
 
     def truncate_document_id(self, doc_id: str) -> str:
         """Truncate document ID to fit within size limits while keeping it meaningful."""
         max_bytes = 120  # Conservative limit
+        id_bytes = doc_id.encode('utf-8')
         
         # If already short enough, return as-is
-        if len(doc_id.encode('utf-8')) <= max_bytes:
+        if len(id_bytes) <= max_bytes:
             return doc_id
         
         # Try to keep the meaningful parts: start and end
-        # Remove middle characters and add ellipsis
-        start_chars = max_bytes // 3
-        end_chars = max_bytes // 3
+        # Remove middle bytes and add ellipsis, so the result is at most 2/3 of the limit
+        start = max_bytes // 3
+        end = len(id_bytes) - max_bytes // 3
         
         # Ensure we don't split in the middle of a UTF-8 character
-        while start_chars > 0 and len(doc_id[:start_chars].encode('utf-8')) > start_chars:
-            start_chars -= 1
+        while start > 0 and (id_bytes[start] & 0xC0) == 0x80:
+            start -= 1
             
-        while end_chars > 0 and len(doc_id[-end_chars:].encode('utf-8')) > end_chars:
-            end_chars -= 1
+        while end < len(id_bytes) and (id_bytes[end] & 0xC0) == 0x80:
+            end += 1
         
-        truncated = doc_id[:start_chars] + "..." + doc_id[-end_chars:]
+        return id_bytes[:start].decode('utf-8') + "..." + id_bytes[end:].decode('utf-8')
+
+    def chunk_document(self, doc_id: str, text: str, text_bytes: bytes, metadata: Dict[str, Any]) -> List[PreparedDocument]:
+        """Split a large document into prepared chunk documents.
+
+        text_bytes must be the UTF-8 encoding of text.
+        """
+        chunk_size = 15000  # 15KB per chunk to stay under limit
         
-        # Make sure the result fits
-        while len(truncated.encode('utf-8')) > max_bytes and start_chars > 1:
-            start_chars -= 1
-            truncated = doc_id[:start_chars] + "..." + doc_id[-end_chars:]
+        if len(text_bytes) <= chunk_size:
+            # Document is small enough, process normally
+            return [PreparedDocument(doc_id, text, self.clean_metadata(metadata), len(text_bytes))]
         
-        return truncated
-
-    def upsert_document_chunked(self, doc_id: str, text: str, metadata: Dict[str, Any]) -> bool:
-        """Upsert a large document by splitting it into chunks."""
-        try:
-            chunk_size = 15000  # 15KB per chunk to stay under limit
-            text_bytes = text.encode('utf-8')
+        # Clean the shared metadata once; each chunk only overlays its chunk fields
+        base_metadata = self.clean_metadata(metadata)
+        
+        # Split into chunks
+        chunks = []
+        start = 0
+        chunk_num = 0
+        
+        while start < len(text_bytes):
+            end = min(start + chunk_size, len(text_bytes))
             
-            if len(text_bytes) <= chunk_size:
-                # Document is small enough, process normally
-                return self.upsert_single_document(doc_id, text, metadata)
+            # Don't break in the middle of a UTF-8 character: back off over
+            # continuation bytes (0b10xxxxxx), at most three of them
+            while end < len(text_bytes) and (text_bytes[end] & 0xC0) == 0x80:
+                end -= 1
             
-            # Split into chunks
-            chunks = []
-            start = 0
-            chunk_num = 0
+            chunk_bytes = text_bytes[start:end]
+            chunk_text = chunk_bytes.decode('utf-8')
             
-            while start < len(text_bytes):
-                end = min(start + chunk_size, len(text_bytes))
-                
-                # Try not to break in the middle of UTF-8 characters
-                while end < len(text_bytes) and (text_bytes[end] & 0x80) != 0:
-                    end -= 1
-                
-                chunk_bytes = text_bytes[start:end]
-                chunk_text = chunk_bytes.decode('utf-8')
-                
-                chunk_id = f"{doc_id}_chunk_{chunk_num}"
-                if len(chunk_id.encode('utf-8')) > 120:
-                    base_id = self.truncate_document_id(doc_id)
-                    chunk_id = f"{base_id}_chunk_{chunk_num}"
-                
-                # Update metadata for chunk
-                chunk_metadata = metadata.copy()
-                chunk_metadata['is_chunk'] = True
-                chunk_metadata['chunk_number'] = chunk_num
-                chunk_metadata['total_chunks'] = -1  # Will be updated after all chunks are created
-                chunk_metadata['original_doc_id'] = doc_id
-                
-                chunks.append((chunk_id, chunk_text, chunk_metadata))
-                
-                start = end
-                chunk_num += 1
+            chunk_id = f"{doc_id}_chunk_{chunk_num}"
+            if len(chunk_id.encode('utf-8')) > 120:
+                base_id = self.truncate_document_id(doc_id)
+                chunk_id = f"{base_id}_chunk_{chunk_num}"
             
-            # Update total_chunks in all chunk metadata
-            for i, (chunk_id, chunk_text, chunk_metadata) in enumerate(chunks):
-                chunk_metadata['total_chunks'] = len(chunks)
+            # Update metadata for chunk
+            chunk_metadata = {
+                **base_metadata,
+                'is_chunk': True,
+                'chunk_number': chunk_num,
+                'total_chunks': -1,  # Will be updated after all chunks are created
+                'original_doc_id': doc_id
+            }
             
-            # Upload all chunks
-            success_count = 0
-            for chunk_id, chunk_text, chunk_metadata in chunks:
-                if self.upsert_single_document(chunk_id, chunk_text, chunk_metadata):
-                    success_count += 1
-                else:
-                    self.logger.error(f"Failed to upload chunk {chunk_id}")
+            chunks.append(PreparedDocument(chunk_id, chunk_text, chunk_metadata, end - start))
+            
+            start = end
+            chunk_num += 1
+        
+        # Update total_chunks in all chunk metadata
+        for chunk in chunks:
+            chunk.metadata['total_chunks'] = len(chunks)
+        
+        return chunks
+
+    def upsert_document_chunked(self, doc_id: str, chunks: List[PreparedDocument]) -> bool:
+        """Upsert the chunks of a large document as their own batch."""
+        try:
+            try:
+                self._upsert(
+                    ids=[chunk.id for chunk in chunks],
+                    documents=[chunk.text for chunk in chunks],
+                    metadatas=[chunk.metadata for chunk in chunks]
+                )
+                success_count = len(chunks)
+            except Exception as e:
+                self.logger.warning(f"Batch upsert of chunks for {doc_id} failed, retrying individually: {e}")
+                success_count = 0
+                for chunk in chunks:
+                    if self.upsert_single_document(chunk.id, chunk.text, chunk.metadata):
+                        success_count += 1
+                    else:
+                        self.logger.error(f"Failed to upload chunk {chunk.id}")
             
             # Consider successful if at least half the chunks uploaded
             success = success_count >= len(chunks) // 2
@@ -361,14 +654,12 @@ class ChromaIndexer:
             return False
 
     def upsert_single_document(self, doc_id: str, text: str, metadata: Dict[str, Any]) -> bool:
-        """Upsert a single document (helper method for chunking)."""
+        """Upsert a single prepared document (fallback when a batch is rejected)."""
         try:
-            clean_metadata = self.clean_metadata(metadata)
-            
-            self.collection.upsert(
+            self._upsert(
                 ids=[doc_id],
                 documents=[text],
-                metadatas=[clean_metadata]
+                metadatas=[metadata]
             )
             
             return True
@@ -385,14 +676,25 @@ class ChromaIndexer:
     def process_content(self, text: str, metadata: Dict[str, Any], file_path: str) -> str:
         """Process content based on metadata flags and file type."""
         try:
+            # Most notes contain no placeholders, so skip extraction with a single scan
+            if not PLACEHOLDER_PATTERN.search(text):
+                return text
+
+            # Without extraction flags the result depends only on the text, and
+            # vaults often repeat the same placeholder-only stub
+            requires_extraction = metadata.get('requiresExtraction', False)
+            requires_ocr = metadata.get('requiresOCR', False)
+            if not (requires_extraction or requires_ocr) and len(text) <= PLACEHOLDER_CACHE_MAX_CHARS:
+                return _replace_placeholders_cached(text)
+
             processed_text = text
             
             # Check if PDF extraction is required
-            if metadata.get('requiresExtraction', False) and file_path.lower().endswith('.pdf'):
+            if requires_extraction and self.is_pdf_file(file_path):
                 processed_text = self.extract_pdf_text(processed_text, file_path)
             
             # Check if image OCR is required
-            if metadata.get('requiresOCR', False) and self.is_image_file(file_path):
+            if requires_ocr and self.is_image_file(file_path):
                 processed_text = self.extract_image_text(processed_text, file_path)
             
             # Replace any remaining placeholders
@@ -406,8 +708,8 @@ class ChromaIndexer:
 
     def extract_pdf_text(self, text: str, file_path: str) -> str:
         """Extract text from PDF file, replacing placeholders."""
-        if not PYPDF2_AVAILABLE:
-            self.logger.warning(f"PDF extraction requested but PyPDF2 not available for {file_path}")
+        if not (PYMUPDF_AVAILABLE or PYPDF2_AVAILABLE):
+            self.logger.warning(f"PDF extraction requested but neither PyMuPDF nor PyPDF2 is available for {file_path}")
             return text
         
         # Check if text contains PDF placeholder
@@ -422,16 +724,10 @@ class ChromaIndexer:
                 self.logger.warning(f"PDF file not found: {full_path}")
                 return text.replace('[PDF_CONTENT_PLACEHOLDER]', '[PDF file not found]')
             
-            extracted_text = ""
-            with open(full_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page_num, page in enumerate(pdf_reader.pages):
-                    try:
-                        page_text = page.extract_text()
-                        if page_text.strip():
-                            extracted_text += f"Page {page_num + 1}:\n{page_text}\n\n"
-                    except Exception as e:
-                        self.logger.warning(f"Failed to extract text from page {page_num + 1} of {file_path}: {e}")
+            if PYMUPDF_AVAILABLE:
+                extracted_text = self.extract_pdf_pages_pymupdf(full_path, file_path)
+            else:
+                extracted_text = self.extract_pdf_pages_pypdf2(full_path, file_path)
             
             if extracted_text.strip():
                 result = text.replace('[PDF_CONTENT_PLACEHOLDER]', extracted_text.strip())
@@ -444,9 +740,42 @@ class ChromaIndexer:
             self.logger.error(f"Failed to extract PDF text from {file_path}: {e}")
             return text.replace('[PDF_CONTENT_PLACEHOLDER]', f'[PDF extraction failed: {str(e)}]')
 
+    def extract_pdf_pages_pymupdf(self, full_path: str, file_path: str) -> str:
+        """Extract page text from a PDF using PyMuPDF."""
+        pages = []
+        if os.path.getsize(full_path) <= PDF_STREAM_MAX_BYTES:
+            with open(full_path, 'rb') as file:
+                doc = fitz.open(stream=file.read(), filetype='pdf')
+        else:
+            doc = fitz.open(full_path)
+        
+        with doc:
+            for page_num, page in enumerate(doc):
+                try:
+                    page_text = page.get_text("text")
+                    if page_text.strip():
+                        pages.append(f"Page {page_num + 1}:\n{page_text}")
+                except Exception as e:
+                    self.logger.warning(f"Failed to extract text from page {page_num + 1} of {file_path}: {e}")
+        return "\n\n".join(pages)
+
+    def extract_pdf_pages_pypdf2(self, full_path: str, file_path: str) -> str:
+        """Extract page text from a PDF using PyPDF2 (slower fallback)."""
+        pages = []
+        with open(full_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            for page_num, page in enumerate(pdf_reader.pages):
+                try:
+                    page_text = page.extract_text()
+                    if page_text.strip():
+                        pages.append(f"Page {page_num + 1}:\n{page_text}")
+                except Exception as e:
+                    self.logger.warning(f"Failed to extract text from page {page_num + 1} of {file_path}: {e}")
+        return "\n\n".join(pages)
+
     def extract_image_text(self, text: str, file_path: str) -> str:
         """Extract text from image file using OCR, replacing placeholders."""
-        if not (PILLOW_AVAILABLE and PYTESSERACT_AVAILABLE):
+        if not (PILLOW_AVAILABLE and (TESSEROCR_AVAILABLE or PYTESSERACT_AVAILABLE)):
             self.logger.warning(f"Image OCR requested but dependencies not available for {file_path}")
             return text
         
@@ -464,12 +793,19 @@ class ChromaIndexer:
             
             # Open and process image
             with Image.open(full_path) as img:
-                # Convert to RGB if necessary
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
+                # Tesseract works on grayscale, so convert up front and
+                # shrink oversized screenshots to cut OCR time
+                if img.mode != 'L':
+                    img = img.convert('L')
+                img.thumbnail((OCR_MAX_DIMENSION, OCR_MAX_DIMENSION), Image.LANCZOS)
                 
                 # Extract text using OCR
-                extracted_text = pytesseract.image_to_string(img)
+                if TESSEROCR_AVAILABLE:
+                    tess_api = self.get_tess_api()
+                    tess_api.SetImage(img)
+                    extracted_text = tess_api.GetUTF8Text()
+                else:
+                    extracted_text = pytesseract.image_to_string(img)
                 
                 if extracted_text.strip():
                     result = text.replace('[IMAGE_OCR_PLACEHOLDER]', extracted_text.strip())
@@ -482,26 +818,174 @@ class ChromaIndexer:
             self.logger.error(f"Failed to extract text from image {file_path}: {e}")
             return text.replace('[IMAGE_OCR_PLACEHOLDER]', f'[OCR extraction failed: {str(e)}]')
 
+    def get_tess_api(self) -> Any:
+        """Return the tesserocr API handle, creating it on first use."""
+        if self._tess_api is None:
+            self._tess_api = PyTessBaseAPI(psm=PSM.AUTO)
+        return self._tess_api
+
+    def close_tess_api(self) -> None:
+        """Release the tesserocr API handle if one was created."""
+        if self._tess_api is not None:
+            self._tess_api.End()
+            self._tess_api = None
+
+    def needs_extraction(self, action: Dict[str, Any]) -> bool:
+        """Check if an upsert action will run PDF extraction or image OCR."""
+        if action.get('action') != 'upsert':
+            return False
+
+        metadata = action.get('metadata', {})
+        file_path = metadata.get('path', '')
+        text = action.get('text', '')
+
+        if (metadata.get('requiresExtraction', False) and
+                self.is_pdf_file(file_path) and
+                (PYMUPDF_AVAILABLE or PYPDF2_AVAILABLE) and
+                '[PDF_CONTENT_PLACEHOLDER]' in text):
+            return True
+
+        return bool(
+            metadata.get('requiresOCR', False) and
+            self.is_image_file(file_path) and
+            PILLOW_AVAILABLE and (TESSEROCR_AVAILABLE or PYTESSERACT_AVAILABLE) and
+            '[IMAGE_OCR_PLACEHOLDER]' in text
+        )
+
+    def submit_extraction(self, action: Dict[str, Any]) -> Optional[Future]:
+        """Start content extraction for an action in a worker process.
+
+        Returns None if the worker pool has broken down, in which case the
+        action should be extracted in-process.
+        """
+        if self.extraction_executor is None:
+            # Workers are spawned rather than forked: the stdin reader thread may
+            # hold stdin's lock, which a forked child would inherit and deadlock on
+            self.extraction_executor = ProcessPoolExecutor(
+                max_workers=EXTRACTION_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_extraction_worker,
+                initargs=(self.vault_root,)
+            )
+        
+        metadata = action.get('metadata', {})
+        file_path = metadata.get('path', '')
+        try:
+            return self.extraction_executor.submit(
+                _extract_content_worker, action.get('text', ''), metadata, file_path
+            )
+        except BrokenProcessPool as e:
+            # A worker died (e.g. crashed on a malformed file), so the pool can't take
+            # more work; later documents get a fresh pool
+            self.logger.warning(f"Extraction worker pool stopped, extracting {file_path} in-process: {e}")
+            self.extraction_executor.shutdown(wait=False, cancel_futures=True)
+            self.extraction_executor = None
+            return None
+
+    def collect_extractions(self, futures: Iterable[Future], pending: Dict[Future, Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], Optional[str]]]:
+        """Yield (action, processed_text) for finished extraction futures, removing them from pending."""
+        for future in futures:
+            action = pending.pop(future)
+            try:
+                processed_text = future.result()
+            except Exception as e:
+                file_path = action.get('metadata', {}).get('path', '')
+                self.logger.warning(f"Extraction worker failed for {file_path}, extracting in-process: {e}")
+                processed_text = None
+            yield action, processed_text
+
+    def iter_processed_actions(self, actions: Iterable[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], Optional[str]]]:
+        """Yield (action, processed_text) pairs as they become ready.
+
+        Actions that need PDF extraction or OCR are sent to worker processes and
+        yielded once extracted, so parsing uses every core and overlaps with the
+        upserts of plain actions. Actions on the same document are still yielded
+        in input order. processed_text is None when the action should be
+        processed in-process.
+        """
+        pending: Dict[Future, Dict[str, Any]] = {}
+        pending_by_id: Dict[Any, Future] = {}
+
+        def collect(futures: Iterable[Future]) -> Iterator[Tuple[Dict[str, Any], Optional[str]]]:
+            for action, processed_text in self.collect_extractions(futures, pending):
+                pending_by_id.pop(action.get('id'), None)
+                yield action, processed_text
+
+        for action in actions:
+            # A later action on a document must not overtake its pending extraction
+            earlier = pending_by_id.get(action.get('id'))
+            if earlier is not None:
+                yield from collect([earlier])
+
+            future = self.submit_extraction(action) if self.needs_extraction(action) else None
+            if future is not None:
+                pending[future] = action
+                pending_by_id[action.get('id')] = future
+                # Bound the number of documents held in flight
+                if len(pending) >= 2 * EXTRACTION_WORKERS:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from collect(done)
+            else:
+                yield action, None
+                yield from collect([future for future in pending if future.done()])
+
+        yield from collect(as_completed(list(pending)))
+
+    def read_actions(self, action_queue: queue.Queue) -> None:
+        """Parse action lines from stdin onto the queue, ending with _EOF (reader thread)."""
+        try:
+            for line in sys.stdin:
+                line = line.strip()
+                if not line:
+                    continue
+                    
+                try:
+                    action_queue.put(json_loads(line))
+                except json.JSONDecodeError as e:
+                    self.logger.error(f"Invalid action JSON: {e}")
+                    self.invalid_actions += 1
+        finally:
+            action_queue.put(_EOF)
+
+    def iter_actions(self) -> Iterator[Dict[str, Any]]:
+        """Stream actions from stdin through a bounded queue filled by a reader thread.
+
+        Sets total_actions once stdin is exhausted.
+        """
+        action_queue: queue.Queue = queue.Queue(maxsize=2 * UPSERT_BATCH_SIZE)
+        reader = threading.Thread(target=self.read_actions, args=(action_queue,), daemon=True)
+        reader.start()
+        
+        count = 0
+        while True:
+            action = action_queue.get()
+            if action is _EOF:
+                break
+            count += 1
+            yield action
+        
+        reader.join()
+        self.total_actions = count
+
     def is_image_file(self, file_path: str) -> bool:
         """Check if file is a supported image format."""
-        image_extensions = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.tif', '.webp'}
-        return Path(file_path).suffix.lower() in image_extensions
+        dot = file_path.rfind('.')
+        return dot >= 0 and file_path[dot + 1:].lower() in IMAGE_EXTENSIONS
+
+    def is_pdf_file(self, file_path: str) -> bool:
+        """Check if file is a PDF."""
+        return file_path[-4:].lower() == '.pdf'
 
     def replace_content_placeholders(self, text: str) -> str:
         """Replace any remaining content placeholders with appropriate messages."""
-        replacements = {
-            '[PDF_CONTENT_PLACEHOLDER]': '[PDF content extraction not configured]',
-            '[IMAGE_OCR_PLACEHOLDER]': '[Image OCR not configured]'
-        }
-        
-        result = text
-        for placeholder, replacement in replacements.items():
-            result = result.replace(placeholder, replacement)
-        
-        return result
+        return _replace_placeholders(text)
+
+    def output_progress(self, message: str, processed: Optional[int] = None, total: Optional[int] = None, flush: bool = True) -> None:
+        """Output progress update as JSON.
 
-    def output_progress(self, message: str, processed: Optional[int] = None, total: Optional[int] = None) -> None:
-        """Output progress update as JSON."""
+        Lines are written to the binary stdout buffer; pass flush=False for
+        messages that can wait for the next flushed line.
+        """
         progress = {
             "type": "progress",
             "message": message
@@ -511,11 +995,21 @@ class ChromaIndexer:
         if total is not None:
             progress["total"] = total
         
-        print(json.dumps(progress), flush=True)
+        if ORJSON_AVAILABLE:
+            # orjson produces UTF-8 bytes, so skip the text layer entirely
+            self._out.write(orjson.dumps(progress))
+        else:
+            self._out.write(json.dumps(progress).encode('utf-8'))
+        self._out.write(b'\n')
+        if flush:
+            self._out.flush()
 
     def run(self) -> int:
         """Main execution loop."""
         try:
+            # Log availability of optional features
+            self.log_feature_availability()
+
             # Read configuration from first line
             first_line = sys.stdin.readline().strip()
             if not first_line:
@@ -523,7 +1017,7 @@ class ChromaIndexer:
                 return 1
 
             try:
-                config_data = json.loads(first_line)
+                config_data = json_loads(first_line)
                 if 'config' not in config_data:
                     self.logger.error("First line must contain config")
                     return 1
@@ -549,53 +1043,56 @@ class ChromaIndexer:
             actions_processed = 0
             actions_failed = 0
             
-            # Read all actions first to get total count
-            actions = []
-            for line in sys.stdin:
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                try:
-                    action = json.loads(line)
-                    actions.append(action)
-                except json.JSONDecodeError as e:
-                    self.logger.error(f"Invalid action JSON: {e}")
-                    actions_failed += 1
-                    continue
-            
-            total_actions = len(actions)
-            self.output_progress(f"Starting to process {total_actions} actions", 0, total_actions)
+            # Actions are streamed from stdin, so the total is only known once it is exhausted
+            self.output_progress("Starting to process actions", 0)
+            last_progress_time = time.monotonic()
+            last_progress_count = 0
             
-            # Now process each action with accurate progress
-            for i, action in enumerate(actions, 1):
+            for action, processed_text in self.iter_processed_actions(self.iter_actions()):
                 # Check if this action requires content extraction
-                action_id = action.get('id', f'action_{i}')
-                metadata = action.get('metadata', {})
-                file_path = metadata.get('path', '')
-                
-                needs_extraction = (
-                    metadata.get('requiresExtraction', False) or
-                    metadata.get('requiresOCR', False)
-                )
+                if self.needs_extraction(action):
+                    file_path = action.get('metadata', {}).get('path', '')
+                    file_type = "PDF" if self.is_pdf_file(file_path) else "image" if self.is_image_file(file_path) else "file"
+                    self.output_progress(
+                        f"Extracting content from {file_type}: {Path(file_path).name}",
+                        actions_processed,
+                        self.total_actions,
+                        flush=False
+                    )
                 
-                if needs_extraction:
-                    file_type = "PDF" if file_path.lower().endswith('.pdf') else "image" if self.is_image_file(file_path) else "file"
-                    self.output_progress(f"Extracting content from {file_type}: {Path(file_path).name}", actions_processed, total_actions)
-                
-                if self.process_action(action):
-                    actions_processed += 1
-                else:
-                    actions_failed += 1
+                succeeded, failed = self.queue_action(action, processed_text)
+                actions_processed += succeeded
+                actions_failed += failed
                     
                 self.processed = actions_processed
                 
-                # Output progress for every action now that we know the total
-                self.output_progress(
-                    f"Processed {actions_processed} of {total_actions} documents",
-                    actions_processed,
-                    total_actions
-                )
+                # Output progress when enough time has passed or enough documents were written
+                if self.total_actions is None:
+                    progress_step = UPSERT_BATCH_SIZE
+                else:
+                    progress_step = max(1, self.total_actions // PROGRESS_STEPS)
+                now = time.monotonic()
+                if (now - last_progress_time < PROGRESS_INTERVAL and
+                        actions_processed - last_progress_count < progress_step):
+                    continue
+                last_progress_time = now
+                last_progress_count = actions_processed
+                
+                if self.total_actions is None:
+                    self.output_progress(f"Processed {actions_processed} documents", actions_processed)
+                else:
+                    self.output_progress(
+                        f"Processed {actions_processed} of {self.total_actions} documents",
+                        actions_processed,
+                        self.total_actions
+                    )
+
+            # Write out anything still waiting in a partial batch
+            succeeded, failed = self.flush_pending()
+            actions_processed += succeeded
+            actions_failed += failed + self.invalid_actions
+            self.processed = actions_processed
+            total_actions = self.total_actions or 0
 
             # Final summary
             self.output_progress(
@@ -618,7 +1115,45 @@ class ChromaIndexer:
             return 1
         except Exception as e:
             self.logger.error(f"Unexpected error: {e}")
+            self.flush_after_error()
             return 1
+        finally:
+            try:
+                self._out.flush()
+            except OSError:
+                pass  # The parent process may already have closed the pipe
+            if self.extraction_executor is not None:
+                self.extraction_executor.shutdown(wait=True, cancel_futures=True)
+            if self.upsert_executor is not None:
+                self.upsert_executor.shutdown(wait=True, cancel_futures=True)
+            self.close_tess_api()
+
+
+def _replace_placeholders(text: str) -> str:
+    """Replace content placeholders with their "not configured" messages."""
+    return PLACEHOLDER_PATTERN.sub(lambda match: PLACEHOLDER_REPLACEMENTS[match.group(0)], text)
+
+
+@lru_cache(maxsize=4096)
+def _replace_placeholders_cached(text: str) -> str:
+    """Cached _replace_placeholders for short texts that don't need extraction."""
+    return _replace_placeholders(text)
+
+
+# Indexer used for content extraction inside each worker process
+_worker_indexer: Optional[ChromaIndexer] = None
+
+
+def _init_extraction_worker(vault_root: str) -> None:
+    """Create the per-process indexer used by extraction workers."""
+    global _worker_indexer
+    _worker_indexer = ChromaIndexer(ChromaConfig("", 0, False, "", "", "", "", ""))
+    _worker_indexer.vault_root = vault_root
+
+
+def _extract_content_worker(text: str, metadata: Dict[str, Any], file_path: str) -> str:
+    """Run PDF extraction / OCR for one document in a worker process."""
+    return _worker_indexer.process_content(text, metadata, file_path)
 
 
 def main():
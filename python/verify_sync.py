@@ -6,11 +6,15 @@ Accepts JSONL on stdin with configuration and file state.
 Outputs verification results as JSON on stdout.
 """
 
+from __future__ import annotations
+
 import sys
 import json
 import logging
-from typing import Dict, List, Set, Any, Optional
-from dataclasses import dataclass
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Collection, Dict, FrozenSet, Iterable, List, Set, Tuple, Any, Optional
+from dataclasses import dataclass, fields
 
 try:
     import chromadb
@@ -23,9 +27,72 @@ except ImportError:
     }), file=sys.stderr)
     sys.exit(1)
 
+# Optional dependencies with graceful degradation
+ORJSON_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    pass
+
+# The file state record lists every path in the vault, so use orjson for it when installed
+json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+# Number of documents requested per page when listing the collection
+CHROMA_PAGE_SIZE = 10000
+# Maximum number of pages fetched from Chroma at the same time
+FETCH_CONCURRENCY = 4
+# Attempts per page request, with exponential backoff starting at FETCH_RETRY_BACKOFF seconds
+FETCH_ATTEMPTS = 3
+FETCH_RETRY_BACKOFF = 0.2
+
+# Path separators and spaces are mapped to underscores in document IDs (same as delta.ts)
+_ID_TRANSLATE = str.maketrans({'/': '_', '\\': '_', ' ': '_'})
+
+
+# Setup logging to stderr so it doesn't interfere with JSON output
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    stream=sys.stderr
+)
+logger = logging.getLogger(__name__)
+
+# Results are written as UTF-8 bytes straight to the binary stdout buffer
+_OUT = sys.stdout.buffer
 
-@dataclass
+# Progress lines differ only in their message, so the rest of the object is written as-is
+_PROGRESS_PREFIX = b'{"type":"progress","message":'
+_PROGRESS_SUFFIX = b'}\n'
+
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize a value to JSON bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+
+def _emit(obj: Dict[str, Any]) -> None:
+    """Write one JSON line to stdout and flush it."""
+    _OUT.write(_dumps(obj))
+    _OUT.write(b'\n')
+    _OUT.flush()
+
+
+def _build_id_maps(paths: Iterable[str]) -> Tuple[Dict[str, str], Set[str]]:
+    """Map local paths to document IDs and collect the set of those IDs."""
+    path_to_id: Dict[str, str] = {path: path.translate(_ID_TRANSLATE) for path in paths}
+    doc_ids: Set[str] = set(path_to_id.values())
+    return path_to_id, doc_ids
+
+
+# Slots are declared by hand for the same reason as index_vault.ChromaConfig
+@dataclass(frozen=True)
 class ChromaConfig:
+    __slots__ = ('host', 'port', 'ssl', 'token_header', 'token', 'tenant', 'database', 'collection')
+
     host: str
     port: int
     ssl: bool
@@ -36,16 +103,11 @@ class ChromaConfig:
     collection: str
 
 
-@dataclass
-class FileInfo:
-    path: str
-    hash: str
-    mtime: number
-    size: number
-
-
-@dataclass
+@dataclass(frozen=True)
 class VerificationResult:
+    __slots__ = ('verified', 'missing_in_chroma', 'extra_in_chroma', 'hash_mismatches',
+                 'total_local_files', 'total_chroma_documents', 'collection_count')
+
     verified: bool
     missing_in_chroma: List[str]
     extra_in_chroma: List[str]
@@ -55,19 +117,15 @@ class VerificationResult:
     collection_count: int
 
 
+# Keys a config record must provide, checked before ChromaConfig is built
+_CFG_FIELDS = frozenset(f.name for f in fields(ChromaConfig))
+
+
 class ChromaVerifier:
     def __init__(self, config: ChromaConfig):
         self.config = config
         self.client: Optional[ClientAPI] = None
         self.collection = None
-        
-        # Setup logging to stderr so it doesn't interfere with JSON output
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            stream=sys.stderr
-        )
-        self.logger = logging.getLogger(__name__)
 
     def connect(self) -> bool:
         """Establish connection to Chroma Cloud."""
@@ -96,9 +154,9 @@ class ChromaVerifier:
             # Test connection by listing collections
             try:
                 collections = self.client.list_collections()
-                self.logger.info(f"Connected to Chroma Cloud. Found {len(collections)} collections.")
+                logger.info(f"Connected to Chroma Cloud. Found {len(collections)} collections.")
             except Exception as e:
-                self.logger.error(f"Failed to list collections: {e}")
+                logger.error(f"Failed to list collections: {e}")
                 return False
 
             # Set tenant and database if supported
@@ -108,27 +166,27 @@ class ChromaVerifier:
                 if hasattr(self.client, 'set_database'):
                     self.client.set_database(self.config.database)
             except Exception as e:
-                self.logger.warning(f"Could not set tenant/database: {e}")
+                logger.warning(f"Could not set tenant/database: {e}")
 
             # Get collection
             try:
                 self.collection = self.client.get_collection(name=self.config.collection)
-                self.logger.info(f"Using collection: {self.config.collection}")
+                logger.info(f"Using collection: {self.config.collection}")
                 return True
             except Exception as e:
-                self.logger.error(f"Collection '{self.config.collection}' not found: {e}")
+                logger.error(f"Collection '{self.config.collection}' not found: {e}")
                 return False
 
         except Exception as e:
-            self.logger.error(f"Connection failed: {e}")
+            logger.error(f"Connection failed: {e}")
             return False
 
-    def verify_sync(self, local_files: Dict[str, FileInfo]) -> VerificationResult:
-        """Verify sync between local files and Chroma collection."""
+    def verify_sync(self, local_paths: Collection[str]) -> VerificationResult:
+        """Verify sync between local file paths and Chroma collection."""
         try:
             self.output_progress("Fetching Chroma collection data...")
             
-            # Get all documents from Chroma collection
+            # Get all document IDs (and stored paths) from Chroma collection
             chroma_data = self.get_all_chroma_documents()
             
             if chroma_data is None:
@@ -144,18 +202,10 @@ class ChromaVerifier:
 
             self.output_progress("Analyzing differences...")
             
-            # Create sets for comparison
-            local_doc_ids = set()
-            local_path_to_id = {}
-            
             # Generate document IDs for local files (same logic as delta.ts)
-            for path, file_info in local_files.items():
-                doc_id = self.generate_document_id(path)
-                local_doc_ids.add(doc_id)
-                local_path_to_id[path] = doc_id
+            local_path_to_id, local_doc_ids = _build_id_maps(local_paths)
 
-            chroma_doc_ids = set(chroma_data['ids'])
-            chroma_metadata = {doc_id: meta for doc_id, meta in zip(chroma_data['ids'], chroma_data['metadatas'])}
+            chroma_doc_ids, chroma_paths = chroma_data
 
             # Find missing documents (in local but not in Chroma)
             missing_in_chroma = []
@@ -164,83 +214,105 @@ class ChromaVerifier:
                     missing_in_chroma.append(path)
 
             # Find extra documents (in Chroma but not in local)
-            extra_in_chroma = []
-            for doc_id in chroma_doc_ids:
-                # Check if this document corresponds to any local file
-                found_locally = False
-                for path, local_doc_id in local_path_to_id.items():
-                    if local_doc_id == doc_id:
-                        found_locally = True
-                        break
-                
-                if not found_locally:
-                    # Try to get path from metadata if available
-                    metadata = chroma_metadata.get(doc_id, {})
-                    path = metadata.get('path', doc_id)
-                    extra_in_chroma.append(path)
+            extra_ids = chroma_doc_ids - local_doc_ids
+            extra_in_chroma = [chroma_paths[doc_id] for doc_id in extra_ids]
 
-            # Find hash mismatches (documents exist in both but content differs)
+            # Hash mismatches can't be detected yet since Chroma doesn't store our
+            # file hashes; once they are in metadata, compare them in the missing
+            # documents loop above rather than in a second pass
             hash_mismatches = []
-            for path, file_info in local_files.items():
-                doc_id = local_path_to_id[path]
-                if doc_id in chroma_doc_ids:
-                    # For now, we don't have a good way to compare hashes
-                    # since Chroma doesn't store our file hashes directly
-                    # This could be enhanced by storing file hashes in metadata
-                    pass
 
             # Determine if verification passed
-            verified = (len(missing_in_chroma) == 0 and 
-                       len(extra_in_chroma) == 0 and 
-                       len(hash_mismatches) == 0)
+            verified = not (missing_in_chroma or extra_in_chroma or hash_mismatches)
 
             return VerificationResult(
                 verified=verified,
                 missing_in_chroma=missing_in_chroma,
                 extra_in_chroma=extra_in_chroma,
                 hash_mismatches=hash_mismatches,
-                total_local_files=len(local_files),
+                total_local_files=len(local_paths),
                 total_chroma_documents=len(chroma_doc_ids),
-                collection_count=self.collection.count()
+                collection_count=len(chroma_doc_ids)
             )
 
         except Exception as e:
-            self.logger.error(f"Verification failed: {e}")
+            logger.error(f"Verification failed: {e}")
             return VerificationResult(
                 verified=False,
                 missing_in_chroma=[],
                 extra_in_chroma=[],
                 hash_mismatches=[],
-                total_local_files=len(local_files),
+                total_local_files=len(local_paths),
                 total_chroma_documents=0,
                 collection_count=0
             )
 
-    def get_all_chroma_documents(self) -> Optional[Dict[str, List[Any]]]:
-        """Retrieve all documents from the Chroma collection."""
+    def get_all_chroma_documents(self) -> Optional[Tuple[FrozenSet[str], Dict[str, Any]]]:
+        """Retrieve document IDs and the path to report for each from the Chroma collection."""
         try:
-            # Get all documents (Chroma handles pagination internally)
-            result = self.collection.get()
-            
-            self.logger.info(f"Retrieved {len(result['ids'])} documents from Chroma collection")
-            return result
+            # Page through the collection, fetching only ids and metadata;
+            # embeddings and documents are never compared. Each ID maps to the
+            # path stored in its metadata, falling back to the ID itself
+            paths: Dict[str, Any] = {}
+
+            def add_page(page: Dict[str, Any]) -> int:
+                page_ids = page['ids']
+                metadatas = page['metadatas'] or [None] * len(page_ids)
+                paths.update(
+                    (doc_id, metadata.get('path', doc_id) if metadata else doc_id)
+                    for doc_id, metadata in zip(page_ids, metadatas)
+                )
+                return len(page_ids)
+
+            # Fetch the pages covering the current count concurrently to hide round-trip latency
+            total = self.collection.count()
+            offsets = range(0, total, CHROMA_PAGE_SIZE)
+            last_page_size = 0
+            with ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY) as executor:
+                futures = {
+                    executor.submit(self.fetch_page, offset): offset
+                    for offset in offsets
+                }
+                for future in as_completed(futures):
+                    page_size = add_page(future.result())
+                    if futures[future] == offsets[-1]:
+                        last_page_size = page_size
+
+            # Keep paging serially while pages are full, in case documents were added after counting
+            offset = len(offsets) * CHROMA_PAGE_SIZE
+            if not offsets or last_page_size == CHROMA_PAGE_SIZE:
+                while add_page(self.fetch_page(offset)) == CHROMA_PAGE_SIZE:
+                    offset += CHROMA_PAGE_SIZE
+
+            logger.info(f"Retrieved {len(paths)} documents from Chroma collection")
+            # The IDs are only used for membership tests and differences from here on
+            return frozenset(paths), paths
             
         except Exception as e:
-            self.logger.error(f"Failed to retrieve documents from Chroma: {e}")
+            logger.error(f"Failed to retrieve documents from Chroma: {e}")
             return None
 
-    def generate_document_id(self, path: str) -> str:
-        """Generate document ID using same logic as delta.ts"""
-        # Replace path separators and special chars to ensure valid Chroma ID
-        return path.replace('/', '_').replace('\\', '_').replace(' ', '_')
+    def fetch_page(self, offset: int) -> Dict[str, Any]:
+        """Fetch one page of document IDs and metadata from the Chroma collection.
+
+        Transient failures are retried so one dropped request doesn't fail the
+        whole verification.
+        """
+        for attempt in range(FETCH_ATTEMPTS):
+            try:
+                return self.collection.get(include=["metadatas"], limit=CHROMA_PAGE_SIZE, offset=offset)
+            except Exception as e:
+                if attempt == FETCH_ATTEMPTS - 1:
+                    raise
+                logger.warning(f"Fetching page at offset {offset} failed, retrying: {e}")
+                time.sleep(FETCH_RETRY_BACKOFF * (2 ** attempt))
 
     def output_progress(self, message: str) -> None:
         """Output progress update as JSON."""
-        progress = {
-            "type": "progress",
-            "message": message
-        }
-        print(json.dumps(progress), flush=True)
+        _OUT.write(_PROGRESS_PREFIX)
+        _OUT.write(_dumps(message))
+        _OUT.write(_PROGRESS_SUFFIX)
+        _OUT.flush()
 
     def output_result(self, result: VerificationResult) -> None:
         """Output verification result as JSON."""
@@ -259,62 +331,55 @@ class ChromaVerifier:
                 "mismatch_count": len(result.hash_mismatches)
             }
         }
-        print(json.dumps(output), flush=True)
+        _emit(output)
 
     def run(self) -> int:
         """Main execution loop."""
         try:
-            # Read configuration and file state from stdin
-            input_data = []
-            for line in sys.stdin:
-                line = line.strip()
-                if line:
-                    try:
-                        data = json.loads(line)
-                        input_data.append(data)
-                    except json.JSONDecodeError as e:
-                        self.logger.error(f"Invalid JSON input: {e}")
-                        return 1
-
-            if len(input_data) < 2:
-                self.logger.error("Expected at least config and file state data")
+            # Read configuration and file state from stdin; only the first two
+            # non-empty lines are used, so stop reading after them
+            lines = (line for line in sys.stdin.buffer if line.strip())
+            config_line = next(lines, None)
+            file_state_line = next(lines, None)
+            if config_line is None or file_state_line is None:
+                logger.error("Expected at least config and file state data")
+                return 1
+
+            try:
+                config_data = json_loads(config_line)
+                file_state_data = json_loads(file_state_line)
+            except json.JSONDecodeError as e:
+                logger.error(f"Invalid JSON input: {e}")
                 return 1
 
             # First line should contain config
-            config_data = input_data[0]
             if 'config' not in config_data:
-                self.logger.error("First line must contain config")
+                logger.error("First line must contain config")
                 return 1
                 
             config_dict = config_data['config']
-            config = ChromaConfig(**config_dict)
+            missing_fields = _CFG_FIELDS - config_dict.keys()
+            if missing_fields:
+                logger.error(f"Config is missing required fields: {', '.join(sorted(missing_fields))}")
+                return 1
+            config = ChromaConfig(**{name: config_dict[name] for name in _CFG_FIELDS})
             self.config = config
 
             # Second line should contain file state
-            file_state_data = input_data[1]
             if 'files' not in file_state_data:
-                self.logger.error("Second line must contain file state")
+                logger.error("Second line must contain file state")
                 return 1
 
-            # Convert file state to FileInfo objects
-            local_files = {}
-            for path, file_data in file_state_data['files'].items():
-                local_files[path] = FileInfo(
-                    path=file_data['path'],
-                    hash=file_data['hash'],
-                    mtime=file_data['mtime'],
-                    size=file_data['size']
-                )
-
             # Connect to Chroma
             self.output_progress("Connecting to Chroma Cloud...")
             if not self.connect():
-                self.logger.error("Failed to connect to Chroma Cloud")
+                logger.error("Failed to connect to Chroma Cloud")
                 return 1
 
             # Perform verification
             self.output_progress("Starting verification...")
-            result = self.verify_sync(local_files)
+            # Only the paths are compared; hashes, mtimes and sizes aren't stored in Chroma
+            result = self.verify_sync(file_state_data['files'].keys())
 
             # Output results
             self.output_result(result)
@@ -322,10 +387,10 @@ class ChromaVerifier:
             return 0 if result.verified else 1
 
         except KeyboardInterrupt:
-            self.logger.info("Interrupted by user")
+            logger.info("Interrupted by user")
             return 1
         except Exception as e:
-            self.logger.error(f"Unexpected error: {e}")
+            logger.error(f"Unexpected error: {e}")
             return 1
 
 